@@ -1,11 +1,6 @@
-from fastapi import FastAPI
 from pydantic import BaseModel
 from datetime import datetime
 
-import random
-
-app = FastAPI()
-
 class TweetInput(BaseModel):
     text: str
 
@@ -4,7 +4,8 @@ Simple X (Twitter API v2) data ingestion and preprocessing pipeline for NLP/ML.
 
 Requirements:
 - Python 3.8+
-- requests (pip install requests)
+- aiohttp (pip install aiohttp)
+- orjson (optional, pip install orjson) for faster JSON encode/decode
 
 Authentication:
 - Set environment variable TWITTER_BEARER_TOKENS with comma-separated list of tokens
@@ -12,10 +13,13 @@ Authentication:
 - Example: TWITTER_BEARER_TOKENS=token1,token2,token3
 
 Token Rotation:
-- The system tries each token in order when rate limited
-- Automatically switches to the next available token
-- Only fails when ALL tokens have been tried and are rate limited
-- Logs which token is currently in use and which have been tried
+- Each token is tracked with the time it next becomes available (its rate-limit reset)
+- When rate limited, the client switches to the token that is available soonest
+- If ALL tokens are rate limited, it waits for the earliest reset (up to max_rate_limit_wait)
+  and only fails when that wait is too long or retries are exhausted
+- Logs which token is currently in use and when limited tokens reset
+- Reset times are persisted to logs/token_state.json (keyed by a SHA-256 prefix of each token)
+  so a restarted process skips tokens that are still limited
 
 Notes:
 - This uses the "Recent Search" endpoint. To run at scale you need appropriate API access/limits.
@@ -30,26 +34,59 @@ Cross-platform:
 Logging:
 - Uses the standard logging module. Adjust level in setup_logger if needed.
 - Logs to console and logs/x_api.log
-- Request history logged to logs/x_request_history.json
-- Successful responses logged to logs/x_success.json
+- Request history logged to logs/x_request_history.jsonl
+- Successful responses logged to logs/x_success.jsonl (meta, result count and tweet ids only)
+- Successful search responses cached in logs/cache for an hour (use_cache/cache_ttl)
+- JSONL records are written by a background thread; call flush_logs() to wait for them
 """
 from __future__ import annotations
 
+import asyncio
+import atexit
+import hashlib
+import heapq
 import json
 import logging
+import multiprocessing
 import os
+import queue
 import re
 import sys
+import threading
 import time
 import unicodedata
 from dataclasses import dataclass
+from enum import Enum
+from functools import partial
 from datetime import datetime
 from html import unescape as html_unescape
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlencode
 
-import requests
+import aiohttp
+from yarl import URL
+
+# orjson is optional: it is several times faster for the nested API payloads, stdlib json is the fallback
+try:
+    import orjson
+
+    def _dumpb(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    def _dumps(obj: Any) -> str:
+        return _dumpb(obj).decode("utf-8")
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, default=str)
+
+    def _dumpb(obj: Any) -> bytes:
+        return _dumps(obj).encode("utf-8")
+
+    _loads = json.loads
 
 # Load environment variables from .env file
 def load_env_file(env_path: Union[str, Path] = ".env") -> None:
@@ -98,55 +135,137 @@ def setup_logger(level: int = logging.INFO) -> logging.Logger:
 
 LOGGER = setup_logger()
 
+# Set X_REQUEST_HISTORY=0 to skip building/writing logs/x_request_history.jsonl records
+REQUEST_HISTORY_ENABLED = os.getenv("X_REQUEST_HISTORY", "1") != "0"
+
+
+class _Lazy:
+    """Defers an expensive log argument until the record is actually formatted."""
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __str__(self) -> str:
+        return self.fn()
+
 
 # -----------------------
 # Response logging helpers
 # -----------------------
+# Log timestamps only need second resolution, so the ISO string is rebuilt once per second
+_TS_CACHE: List[Any] = [0, ""]
+
+
+def _now_iso() -> str:
+    t = int(time.time())
+    if t != _TS_CACHE[0]:
+        _TS_CACHE[0] = t
+        _TS_CACHE[1] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t))
+    return _TS_CACHE[1]
+
+
+# Records are handed to a background thread that writes whatever has queued up in one
+# write() per file, instead of mkdir/open/write/close for every API call.
+_LOG_QUEUE: "queue.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = queue.Queue()
+_LOG_THREAD: Optional[threading.Thread] = None
+_LOG_THREAD_LOCK = threading.Lock()
+
+
+def _log_worker() -> None:
+    handles: Dict[str, Any] = {}
+    stop = False
+    try:
+        while not stop:
+            batch = [_LOG_QUEUE.get()]
+            while True:
+                try:
+                    batch.append(_LOG_QUEUE.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: Dict[str, List[str]] = {}
+            for item in batch:
+                if item is None:
+                    stop = True
+                    continue
+                filepath, record = item
+                lines.setdefault(filepath, []).append(_dumps(record))
+
+            for filepath, records in lines.items():
+                fh = handles.get(filepath)
+                if fh is None:
+                    path = Path(filepath)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    fh = handles[filepath] = path.open("a", encoding="utf-8")
+                fh.write("\n".join(records) + "\n")
+                fh.flush()
+
+            for _ in batch:
+                _LOG_QUEUE.task_done()
+    finally:
+        for fh in handles.values():
+            fh.close()
+
+
+def _ensure_log_worker() -> None:
+    global _LOG_THREAD
+    if _LOG_THREAD is not None:
+        return
+    with _LOG_THREAD_LOCK:
+        if _LOG_THREAD is None:
+            _LOG_THREAD = threading.Thread(target=_log_worker, name="x-api-log-writer", daemon=True)
+            _LOG_THREAD.start()
+
+
+def flush_logs() -> None:
+    """Block until every queued log record has been written."""
+    if _LOG_THREAD is not None:
+        _LOG_QUEUE.join()
+
+
+@atexit.register
+def _stop_log_worker() -> None:
+    if _LOG_THREAD is not None and _LOG_THREAD.is_alive():
+        _LOG_QUEUE.put(None)
+        _LOG_THREAD.join(timeout=5)
+
+
 def log_response_to_file(response_data: Dict[str, Any], filepath: Union[str, Path]) -> None:
     """
-    Append a response record to a JSON file.
-    Each record includes timestamp and the response data.
+    Queue a response record for appending to a JSONL file (one JSON object per line).
+    Each record includes timestamp and the response data. Call flush_logs() to wait
+    until it is on disk.
     """
-    path = Path(filepath)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    
     record = {
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "timestamp": _now_iso(),
         "data": response_data
     }
     
-    # Read existing data
-    existing_data = []
-    if path.exists():
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                existing_data = json.load(f)
-                if not isinstance(existing_data, list):
-                    existing_data = [existing_data]
-        except (json.JSONDecodeError, Exception) as e:
-            LOGGER.warning("Could not read existing log file %s: %s. Starting fresh.", path, e)
-            existing_data = []
-    
-    # Append new record
-    existing_data.append(record)
-    
-    # Write back
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(existing_data, f, ensure_ascii=False, indent=2)
-    
-    LOGGER.debug("Logged response to %s", path)
+    _ensure_log_worker()
+    _LOG_QUEUE.put((str(filepath), record))
 
 
 # -----------------------
 # Token Rotation System
 # -----------------------
+# Rate-limit resets survive restarts here, keyed by a hash prefix so tokens never hit disk
+TOKEN_STATE_PATH = Path("logs/token_state.json")
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
 class TokenRotator:
     """
     Manages rotation of multiple API bearer tokens.
     Automatically switches to the next token when rate limits are hit.
     Cycles through all tokens until all are exhausted.
     """
-    def __init__(self, tokens: Optional[List[str]] = None):
+    def __init__(
+        self,
+        tokens: Optional[List[str]] = None,
+        state_path: Optional[Union[str, Path]] = TOKEN_STATE_PATH,
+    ):
         if tokens is None:
             # Load from environment variable (comma-separated)
             # Try TWITTER_BEARER_TOKENS first (plural), then fallback to singular
@@ -162,66 +281,214 @@ class TokenRotator:
         if not self.tokens:
             raise RuntimeError("No valid bearer tokens provided.")
         
-        self.current_index = 0
         self.rate_limit_info = {}  # Track rate limit info per token
-        self.tried_tokens = set()  # Track which tokens we've tried
+        self.state_path = Path(state_path) if state_path else None
+        resets = self._load_state()
+        # Min-heap of (next_available_epoch, index, token); the head is the token usable soonest
+        self._heap: List[Tuple[float, int, str]] = [
+            (resets.get(_token_hash(tok), 0.0), i, tok) for i, tok in enumerate(self.tokens)
+        ]
+        heapq.heapify(self._heap)
+        self.current_index = self._heap[0][1]
         LOGGER.info("Initialized TokenRotator with %d token(s)", len(self.tokens))
+        limited = sum(1 for t, _, _ in self._heap if t > time.time())
+        if limited:
+            LOGGER.info("%d token(s) still rate limited from a previous run", limited)
+    
+    def _load_state(self) -> Dict[str, float]:
+        """Read persisted {token_hash: reset_epoch}, keeping only resets that are still in the future."""
+        if not self.state_path or not self.state_path.exists():
+            return {}
+        try:
+            with self.state_path.open("r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            LOGGER.warning("Ignoring unreadable token state %s: %r", self.state_path, e)
+            return {}
+        if not isinstance(state, dict):
+            LOGGER.warning("Ignoring token state %s: expected an object, got %s", self.state_path, type(state).__name__)
+            return {}
+        now = time.time()
+        return {k: float(v) for k, v in state.items() if isinstance(v, (int, float)) and v > now}
+    
+    def _save_state(self) -> None:
+        """Atomically rewrite the persisted reset times for tokens that are still limited."""
+        if not self.state_path:
+            return
+        now = time.time()
+        state = {_token_hash(tok): t for t, _, tok in self._heap if t > now}
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            with NamedTemporaryFile("w", dir=str(self.state_path.parent), delete=False, encoding="utf-8") as tmp:
+                tmp_path = Path(tmp.name)
+                json.dump(state, tmp)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            LOGGER.warning("Could not persist token state to %s: %r", self.state_path, e)
     
     def get_current_token(self) -> str:
         """Get the current active token."""
         return self.tokens[self.current_index]
     
-    def rotate(self) -> bool:
+    def acquire(self) -> Tuple[str, float]:
         """
-        Rotate to the next token.
-        Returns True if rotation was successful, False if all tokens have been tried.
+        Select the token that becomes available soonest and make it current.
+        Returns (token, seconds to wait before it can be used); the wait is 0 if it is usable now.
         """
-        if len(self.tokens) == 1:
-            LOGGER.warning("Only one token available - cannot rotate")
-            self.tried_tokens.add(0)
-            return False
-        
-        # Mark current token as tried
-        self.tried_tokens.add(self.current_index)
-        
-        # Check if we've tried all tokens
-        if len(self.tried_tokens) >= len(self.tokens):
-            LOGGER.error("All %d tokens have been tried and are rate limited", len(self.tokens))
-            return False
-        
-        old_index = self.current_index
-        # Move to next token
-        self.current_index = (self.current_index + 1) % len(self.tokens)
-        
-        LOGGER.info("Rotated from token %d to token %d (%d/%d tokens tried)", 
-                   old_index + 1, self.current_index + 1, 
-                   len(self.tried_tokens), len(self.tokens))
-        return True
+        next_available, index, token = self._heap[0]
+        if index != self.current_index:
+            LOGGER.info("Switching from token %d to token %d", self.current_index + 1, index + 1)
+        self.current_index = index
+        return token, max(0.0, next_available - time.time())
     
     def record_rate_limit(self, reset_timestamp: int) -> None:
-        """Record rate limit info for current token."""
+        """Record rate limit info for current token and mark it unavailable until reset."""
         token_key = f"token_{self.current_index}"
         self.rate_limit_info[token_key] = {
             "reset_timestamp": reset_timestamp,
             "reset_time": datetime.fromtimestamp(reset_timestamp).strftime("%Y-%m-%d %H:%M:%S")
         }
+        # The current token may no longer be at the head if several requests shared it
+        self._heap = [
+            (float(reset_timestamp) if i == self.current_index else t, i, tok) for t, i, tok in self._heap
+        ]
+        heapq.heapify(self._heap)
+        self._save_state()
         LOGGER.info("Token %d rate limited until %s", 
                    self.current_index + 1, 
                    self.rate_limit_info[token_key]["reset_time"])
     
     def get_status(self) -> Dict[str, Any]:
         """Get current status of all tokens."""
+        now = time.time()
         return {
             "total_tokens": len(self.tokens),
             "current_token_index": self.current_index + 1,
-            "tokens_tried": len(self.tried_tokens),
+            "tokens_available": sum(1 for t, _, _ in self._heap if t <= now),
             "rate_limit_info": self.rate_limit_info
         }
 
 
+# -----------------------
+# Client-side throttling
+# -----------------------
+# X rate limits are counted over 15 minute windows
+RATE_LIMIT_WINDOW_S = 15 * 60
+
+
+class TokenBucket:
+    """
+    Client-side token bucket: `capacity` requests, refilled evenly over `fill_time_s` seconds.
+    Lets the client wait before a request it knows would be rate limited instead of spending it on a 429.
+    """
+    def __init__(self, capacity: float, fill_time_s: float):
+        self.capacity = capacity
+        self.fill_time_s = fill_time_s
+        self.tokens = capacity
+        self.last = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) / self.fill_time_s * self.capacity)
+        self.last = now
+    
+    def acquire(self) -> float:
+        """
+        Reserve one request slot.
+        Returns the seconds the caller must wait before sending (0 if a slot is free now).
+        """
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens * self.fill_time_s / self.capacity)
+    
+    def wait_time(self) -> float:
+        """Seconds until a slot is free, without reserving it (0 if one is free now)."""
+        self._refill()
+        return max(0.0, (1 - self.tokens) * self.fill_time_s / self.capacity)
+    
+    def sync(self, limit: int, remaining: int, reset: Optional[int] = None) -> None:
+        """Adopt the server's view of the window from x-rate-limit-* response headers."""
+        self._refill()
+        self.capacity = max(1, limit)
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset:
+            # Empty until the server-side window resets
+            self.tokens = 1 - max(0.0, reset - time.time()) / self.fill_time_s * self.capacity
+
+
 # -----------------------
 # Twitter/X API Client
 # -----------------------
+# One aiohttp session per event loop, shared by every TwitterClient (connection pooling/keep-alive)
+_SESSION: Optional[aiohttp.ClientSession] = None
+_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use in the running loop."""
+    global _SESSION, _SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _SESSION is None or _SESSION.closed or _SESSION_LOOP is not loop:
+        _SESSION = aiohttp.ClientSession()
+        _SESSION_LOOP = loop
+    return _SESSION
+
+
+async def close_session() -> None:
+    """Close the shared aiohttp session. Call once on shutdown to avoid leaking connections."""
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+# -----------------------
+# Response cache
+# -----------------------
+# Identical searches (same URL + params) within the TTL are served from disk instead of spending quota
+CACHE_DIR = Path("logs/cache")
+DEFAULT_CACHE_TTL = 3600  # Recent Search results go stale quickly, so one hour
+
+
+def _cache_key(url: str, params: Dict[str, Any]) -> str:
+    canonical = json.dumps({"url": url, "params": params}, sort_keys=True, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_read(key: str, ttl: float) -> Optional[Dict[str, Any]]:
+    """Return the cached payload for key if it exists and is younger than ttl seconds."""
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        with path.open("rb") as f:
+            return _loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        LOGGER.warning("Ignoring unreadable cache entry %s: %r", path, e)
+        return None
+
+
+def _cache_write(key: str, payload: Dict[str, Any]) -> None:
+    """Atomically store payload under key."""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile("w", dir=str(CACHE_DIR), delete=False, encoding="utf-8") as tmp:
+            tmp_path = Path(tmp.name)
+            tmp.write(_dumps(payload))
+        os.replace(tmp_path, CACHE_DIR / f"{key}.json")
+    except OSError as e:
+        LOGGER.warning("Could not write cache entry %s: %r", key, e)
+
+
+class _Action(Enum):
+    """What aget() does after a failed attempt."""
+    RETRY = 1   # sleep for the returned delay, then try again
+    ROTATE = 2  # switched to a fresh token, try again immediately
+    RAISE = 3
+
+
 @dataclass
 class TwitterClient:
     """
@@ -233,12 +500,14 @@ class TwitterClient:
         timeout: per-request timeout seconds.
         max_retries: retries for transient errors and 429 rate limits.
         backoff_factor: backoff multiplier for retries.
+        max_rate_limit_wait: longest wait (seconds) for a rate-limited token to reset before giving up.
     """
     bearer_token: Optional[str] = None
     base_url: str = "https://api.x.com"
     timeout: int = 30
     max_retries: int = 3  # Reduced from 5 to be more conservative
     backoff_factor: float = 1.5
+    max_rate_limit_wait: float = 960.0  # one Free-tier window (15 min) plus slack
 
     def __post_init__(self):
         if not self.bearer_token:
@@ -248,164 +517,310 @@ class TwitterClient:
         else:
             self.token_rotator = None
         
-        self.session = requests.Session()
+        self.headers: Dict[str, str] = {}
         self._update_session_token()
+        # One bucket per (endpoint path, token), created from the first response's rate-limit headers
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
     
     def _update_session_token(self):
-        """Update the session with the current bearer token."""
-        self.session.headers.update({"Authorization": f"Bearer {self.bearer_token}"})
+        """Update the request headers with the current bearer token."""
+        self.headers["Authorization"] = f"Bearer {self.bearer_token}"
+
+    def _update_bucket(self, path: str, headers: Any) -> None:
+        """Create or adjust the throttling bucket for this endpoint/token from response headers."""
+        limit = headers.get("x-rate-limit-limit")
+        remaining = headers.get("x-rate-limit-remaining")
+        reset = headers.get("x-rate-limit-reset")
+        if not (limit and limit.isdigit() and remaining and remaining.isdigit()):
+            return
+        key = (path, self.bearer_token)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(int(limit), RATE_LIMIT_WINDOW_S)
+        bucket.sync(int(limit), int(remaining), int(reset) if reset and reset.isdigit() else None)
+
+    def _throttle(self, path: str) -> float:
+        """
+        Reserve a request slot for `path`, switching to another token if the current one's bucket is empty.
+        Returns the seconds to wait before sending: 0 while any token has a free slot, otherwise
+        the wait for the soonest one.
+
+        Raises RuntimeError if that wait is longer than max_rate_limit_wait, rather than
+        sending a request that would only come back as a 429.
+        """
+        rotator_wait = 0.0
+        n_tokens = len(self.token_rotator.tokens) if self.token_rotator else 1
+        for _ in range(n_tokens):
+            bucket = self._buckets.get((path, self.bearer_token))
+            wait = bucket.wait_time() if bucket else 0.0
+            if wait <= 0 or not self.token_rotator:
+                break
+            # This token's window is used up: park it until the bucket refills and take the soonest token
+            self.token_rotator.record_rate_limit(int(time.time() + wait) + 1)
+            token, rotator_wait = self.token_rotator.acquire()
+            if token != self.bearer_token:
+                self.bearer_token = token
+                self._update_session_token()
+            if rotator_wait > 0:
+                # Every token is parked; this is the one that frees up first
+                break
+        bucket = self._buckets.get((path, self.bearer_token))
+        wait = max(rotator_wait, bucket.wait_time() if bucket else 0.0)
+        if wait > self.max_rate_limit_wait:
+            LOGGER.error("All tokens are out of requests for %s; next slot frees up in %.1f minutes", path, wait / 60)
+            raise RuntimeError(f"Rate limit for {path} resets in {wait:.0f}s, beyond max_rate_limit_wait")
+        return max(rotator_wait, bucket.acquire() if bucket else 0.0)
 
     def get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Blocking wrapper around aget() for synchronous callers.
+
+        Raises aiohttp.ClientResponseError for unrecoverable errors.
+        """
+        async def _run() -> Dict[str, Any]:
+            try:
+                return await self.aget(path, params)
+            finally:
+                await close_session()
+
+        return asyncio.run(_run())
+
+    async def aget(
+        self,
+        path: str,
+        params: Dict[str, Any],
+        *,
+        use_cache: bool = False,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+    ) -> Dict[str, Any]:
         """
         GET request with basic retry + backoff for 429/5xx.
 
-        Raises requests.HTTPError for unrecoverable errors.
+        With use_cache, a successful response for the same URL/params younger than
+        cache_ttl seconds is returned from logs/cache without calling the API.
+
+        Raises aiohttp.ClientResponseError for unrecoverable errors.
         """
         url = f"{self.base_url}{path}"
-        attempt = 0
+        cache_key = _cache_key(url, params) if use_cache else None
+        if cache_key:
+            cached = _cache_read(cache_key, cache_ttl)
+            if cached is not None:
+                LOGGER.info("Cache hit for %s (key %s); skipping API call", url, cache_key)
+                return cached
+        # Encode the query string once; retries reuse the same URL instead of re-encoding params
+        request_url = URL(f"{url}?{urlencode(params, doseq=True, safe=':,')}", encoded=True)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        rate_limit_waits = 0
+        # Transport/5xx failures so far; counted apart from `attempt`, which also grows on token rotations
+        errors = 0
+        session = await get_session()
+        # Token switches don't consume the retry budget, so allow one full rotation per retry
+        n_tokens = len(self.token_rotator.tokens) if self.token_rotator else 1
+        max_attempts = (self.max_retries + 1) * n_tokens
         
-        # Log request details
-        LOGGER.info("Making request to %s with params: %s", url, json.dumps(params, default=str))
+        # Log request details (params are only serialized if DEBUG is enabled)
+        LOGGER.info("Making request to %s", url)
+        LOGGER.debug("Request params: %s", _Lazy(lambda: _dumps(params)))
         
-        while True:
-            attempt += 1
+        for attempt in range(1, max_attempts + 1):
+            # Throttle proactively once we know this endpoint's limits (rotating off exhausted tokens first)
+            delay = self._throttle(path)
+            if delay > 0:
+                LOGGER.info("Throttling: waiting %.1fs before calling %s", delay, path)
+                await asyncio.sleep(delay)
+            
             request_start = time.time()
             
             try:
-                resp = self.session.get(url, params=params, timeout=self.timeout)
+                async with session.get(request_url, headers=self.headers, timeout=timeout) as resp:
+                    body = await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                errors += 1
+                action, delay = self._handle_exception(e, url, params, attempt, time.time() - request_start, errors)
+                if action is _Action.RAISE:
+                    raise
+            else:
                 request_duration = time.time() - request_start
+                self._update_bucket(path, resp.headers)
+                self._log_request(url, params, attempt, resp, body, request_duration)
                 
-                # Log all request/response info
-                request_log = {
-                    "timestamp": datetime.utcnow().isoformat() + "Z",
-                    "attempt": attempt,
-                    "method": "GET",
-                    "url": url,
-                    "params": params,
-                    "status_code": resp.status_code,
-                    "duration_seconds": round(request_duration, 3),
-                    "headers": dict(resp.headers),
-                }
-                
-                # Add response body for non-200 responses
-                if resp.status_code != 200:
+                if resp.status == 200:
+                    return self._handle_success(url, params, attempt, body, request_duration, cache_key)
+                if resp.status == 429:
+                    action, delay = self._handle_429(resp, body, attempt, rate_limit_waits)
+                elif 500 <= resp.status < 600:
+                    errors += 1
+                    action, delay = self._handle_5xx(resp, attempt, errors)
+                else:
+                    # Non-retryable
                     try:
-                        request_log["response_body"] = resp.json()
+                        err = _loads(body)
                     except Exception:
-                        request_log["response_body"] = resp.text
-                
-                # Log to request history file
-                log_response_to_file(request_log, "logs/x_request_history.json")
+                        err = body.decode("utf-8", "replace")
+                    LOGGER.error("HTTP %s: %s", resp.status, err)
+                    action, delay = _Action.RAISE, 0.0
                 
-            except requests.RequestException as e:
-                request_duration = time.time() - request_start
-                LOGGER.error("Request exception on attempt %d after %.2fs: %s", attempt, request_duration, e)
-                
-                # Log failed request
-                error_log = {
-                    "timestamp": datetime.utcnow().isoformat() + "Z",
-                    "attempt": attempt,
-                    "method": "GET",
-                    "url": url,
-                    "params": params,
-                    "error": str(e),
-                    "duration_seconds": round(request_duration, 3),
-                }
-                log_response_to_file(error_log, "logs/x_request_history.json")
-                
-                if attempt >= self.max_retries:
-                    LOGGER.error("Request failed after %d retries: %s", self.max_retries, e)
-                    raise
-                sleep_s = self.backoff_factor * attempt
-                LOGGER.warning("Request exception: %s. Retrying in %.1fs", e, sleep_s)
-                time.sleep(sleep_s)
-                continue
-
-            if resp.status_code == 200:
-                response_json = resp.json()
-                
-                # Log successful response
-                LOGGER.info("Successful response (200) in %.2fs. Data count: %d", 
-                           request_duration, len(response_json.get("data", [])))
-                
-                success_log = {
-                    "timestamp": datetime.utcnow().isoformat() + "Z",
-                    "attempt": attempt,
-                    "url": url,
-                    "params": params,
-                    "status_code": 200,
-                    "duration_seconds": round(request_duration, 3),
-                    "result_count": len(response_json.get("data", [])),
-                    "meta": response_json.get("meta", {}),
-                    "response": response_json,
-                }
-                log_response_to_file(success_log, "logs/x_success.json")
-                
-                return response_json
-
-            if resp.status_code == 429:
-                # Respect rate limit reset if provided
-                reset = resp.headers.get("x-rate-limit-reset")
-                remaining = resp.headers.get("x-rate-limit-remaining", "unknown")
-                limit = resp.headers.get("x-rate-limit-limit", "unknown")
-                
-                # Try to get error details from response body
-                try:
-                    error_body = resp.json()
-                    error_msg = error_body.get("detail") or error_body.get("title") or str(error_body)
-                except Exception:
-                    error_msg = resp.text
-                
-                LOGGER.warning("Rate limited (429). Remaining: %s, Limit: %s. Error: %s", 
-                              remaining, limit, error_msg)
-                
-                if reset and reset.isdigit():
-                    wait_s = max(0, int(reset) - int(time.time())) + 1
-                    reset_time = datetime.fromtimestamp(int(reset)).strftime("%Y-%m-%d %H:%M:%S")
-                    LOGGER.warning("Current token rate limited until: %s (in %.1f seconds / %.1f minutes)", 
-                                  reset_time, wait_s, wait_s/60)
-                    
-                    # Record rate limit for this token
-                    if self.token_rotator:
-                        self.token_rotator.record_rate_limit(int(reset))
-                else:
-                    wait_s = self.backoff_factor * attempt
-                
-                # Try to rotate to next token
-                if self.token_rotator and self.token_rotator.rotate():
-                    self.bearer_token = self.token_rotator.get_current_token()
-                    self._update_session_token()
-                    LOGGER.info("Switched to next token. Retrying request immediately...")
-                    continue  # Retry with new token
-                
-                # No more tokens available
-                LOGGER.error("API access denied due to rate limiting. This usually means:")
-                LOGGER.error("  1. All available tokens are rate limited")
-                LOGGER.error("  2. You're on Free tier with very restrictive limits (1 req/15min)")
-                LOGGER.error("  3. Consider upgrading API access tier")
-                LOGGER.error("  4. Check https://developer.x.com/en/portal/dashboard for your limits")
-                LOGGER.error("Next available token resets in %.1f minutes", wait_s/60)
-                
-                # Stop immediately - don't wait
-                resp.raise_for_status()
-
-            if 500 <= resp.status_code < 600:
-                LOGGER.error("Server error %s on attempt %d", resp.status_code, attempt)
-                if attempt >= self.max_retries:
+                if action is _Action.RAISE:
                     resp.raise_for_status()
-                sleep_s = self.backoff_factor * attempt
-                LOGGER.warning("Server error %s. Retrying in %.1fs", resp.status_code, sleep_s)
-                time.sleep(sleep_s)
-                continue
-
-            # Non-retryable
+                if action is _Action.RETRY and resp.status == 429:
+                    rate_limit_waits += 1
+            
+            if delay > 0:
+                await asyncio.sleep(delay)
+        
+        LOGGER.error("Giving up on %s after %d attempts", url, max_attempts)
+        resp.raise_for_status()
+        raise RuntimeError(f"Request to {url} failed after {max_attempts} attempts")
+
+    def _log_request(
+        self, url: str, params: Dict[str, Any], attempt: int, resp: Any, body: bytes, duration: float
+    ) -> None:
+        """Append one response to the request history log (when enabled)."""
+        if not REQUEST_HISTORY_ENABLED:
+            return
+        request_log = {
+            "timestamp": _now_iso(),
+            "attempt": attempt,
+            "method": "GET",
+            "url": url,
+            "params": params,
+            "status_code": resp.status,
+            "duration_seconds": round(duration, 3),
+            # Only the headers we act on, rather than copying all ~20 of them
+            "rate_limit": {
+                "limit": resp.headers.get("x-rate-limit-limit"),
+                "remaining": resp.headers.get("x-rate-limit-remaining"),
+                "reset": resp.headers.get("x-rate-limit-reset"),
+            },
+        }
+        
+        # Add response body for non-200 responses
+        if resp.status != 200:
             try:
-                err = resp.json()
+                request_log["response_body"] = _loads(body)
             except Exception:
-                err = resp.text
-            LOGGER.error("HTTP %s: %s", resp.status_code, err)
-            resp.raise_for_status()
-
+                request_log["response_body"] = body.decode("utf-8", "replace")
+        
+        log_response_to_file(request_log, "logs/x_request_history.jsonl")
+
+    def _handle_success(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        attempt: int,
+        body: bytes,
+        duration: float,
+        cache_key: Optional[str],
+    ) -> Dict[str, Any]:
+        """Decode a 200 response, log a summary and cache it if requested."""
+        response_json = _loads(body)
+        tweets = response_json.get("data", [])
+        
+        LOGGER.info("Successful response (200) in %.2fs. Data count: %d", duration, len(tweets))
+        
+        # Only a summary is logged; the payload itself is returned to the caller, not kept twice
+        success_log = {
+            "timestamp": _now_iso(),
+            "attempt": attempt,
+            "url": url,
+            "params": params,
+            "status_code": 200,
+            "duration_seconds": round(duration, 3),
+            "result_count": len(tweets),
+            "meta": response_json.get("meta", {}),
+            "tweet_ids": [t.get("id") for t in tweets],
+        }
+        log_response_to_file(success_log, "logs/x_success.jsonl")
+        if cache_key:
+            _cache_write(cache_key, response_json)
+        return response_json
+
+    def _handle_exception(
+        self, e: BaseException, url: str, params: Dict[str, Any], attempt: int, duration: float, errors: int
+    ) -> Tuple[_Action, float]:
+        """Log a transport error and decide whether to back off and retry (`errors` counts this one)."""
+        LOGGER.error("Request exception on attempt %d after %.2fs: %r", attempt, duration, e)
+        
+        if REQUEST_HISTORY_ENABLED:
+            error_log = {
+                "timestamp": _now_iso(),
+                "attempt": attempt,
+                "method": "GET",
+                "url": url,
+                "params": params,
+                "error": repr(e),
+                "duration_seconds": round(duration, 3),
+            }
+            log_response_to_file(error_log, "logs/x_request_history.jsonl")
+        
+        if errors >= self.max_retries:
+            LOGGER.error("Request failed after %d retries: %r", self.max_retries, e)
+            return _Action.RAISE, 0.0
+        sleep_s = self.backoff_factor * errors
+        LOGGER.warning("Request exception: %r. Retrying in %.1fs", e, sleep_s)
+        return _Action.RETRY, sleep_s
+
+    def _handle_429(self, resp: Any, body: bytes, attempt: int, rate_limit_waits: int) -> Tuple[_Action, float]:
+        """Mark the current token limited, then rotate, wait for a reset, or give up."""
+        # Respect rate limit reset if provided
+        reset = resp.headers.get("x-rate-limit-reset")
+        remaining = resp.headers.get("x-rate-limit-remaining", "unknown")
+        limit = resp.headers.get("x-rate-limit-limit", "unknown")
+        
+        # Try to get error details from response body
+        try:
+            error_body = _loads(body)
+            error_msg = error_body.get("detail") or error_body.get("title") or str(error_body)
+        except Exception:
+            error_msg = body.decode("utf-8", "replace")
+        
+        LOGGER.warning("Rate limited (429). Remaining: %s, Limit: %s. Error: %s", 
+                      remaining, limit, error_msg)
+        
+        if reset and reset.isdigit():
+            reset_ts = int(reset)
+            wait_s = max(0, reset_ts - int(time.time())) + 1
+            reset_time = datetime.fromtimestamp(reset_ts).strftime("%Y-%m-%d %H:%M:%S")
+            LOGGER.warning("Current token rate limited until: %s (in %.1f seconds / %.1f minutes)", 
+                          reset_time, wait_s, wait_s/60)
+        else:
+            wait_s = self.backoff_factor * attempt
+            reset_ts = int(time.time() + wait_s)
+        
+        # Mark this token limited and switch to whichever token frees up first
+        if self.token_rotator:
+            self.token_rotator.record_rate_limit(reset_ts)
+            token, wait_s = self.token_rotator.acquire()
+            if token != self.bearer_token:
+                self.bearer_token = token
+                self._update_session_token()
+            if wait_s <= 0:
+                LOGGER.info("Switched to next token. Retrying request immediately...")
+                return _Action.ROTATE, 0.0
+        
+        # Every token is limited: wait for the earliest reset if it is close enough
+        if wait_s <= self.max_rate_limit_wait and rate_limit_waits < self.max_retries:
+            LOGGER.warning("All tokens rate limited. Waiting %.1fs for the next reset", wait_s)
+            return _Action.RETRY, wait_s
+        
+        # No more tokens available
+        LOGGER.error("API access denied due to rate limiting. This usually means:")
+        LOGGER.error("  1. All available tokens are rate limited")
+        LOGGER.error("  2. You're on Free tier with very restrictive limits (1 req/15min)")
+        LOGGER.error("  3. Consider upgrading API access tier")
+        LOGGER.error("  4. Check https://developer.x.com/en/portal/dashboard for your limits")
+        LOGGER.error("Next available token resets in %.1f minutes", wait_s/60)
+        return _Action.RAISE, 0.0
+
+    def _handle_5xx(self, resp: Any, attempt: int, errors: int) -> Tuple[_Action, float]:
+        """Back off and retry server errors until the retry budget is spent (`errors` counts this one)."""
+        LOGGER.error("Server error %s on attempt %d", resp.status, attempt)
+        if errors >= self.max_retries:
+            return _Action.RAISE, 0.0
+        sleep_s = self.backoff_factor * errors
+        LOGGER.warning("Server error %s. Retrying in %.1fs", resp.status, sleep_s)
+        return _Action.RETRY, sleep_s
 
 # -----------------------
 # Utility: Query builder
@@ -434,49 +849,98 @@ def build_search_query(
     Returns:
         Query string.
     """
-    parts: List[str] = []
-    if hashtag:
-        h = hashtag
-        if not h.startswith("#"):
-            h = f"#{h}"
-        parts.append(h)
-
-    if keywords:
-        kw_parts = []
-        for k in keywords:
-            k = k.strip()
-            if not k:
-                continue
+    def _parts() -> Iterable[str]:
+        if hashtag:
+            yield hashtag if hashtag.startswith("#") else f"#{hashtag}"
+
+        if keywords:
             # Quote multi-word tokens
-            if re.search(r"\s", k):
-                kw_parts.append(f'"{k}"')
-            else:
-                kw_parts.append(k)
-        if kw_parts:
-            parts.append("(" + " OR ".join(kw_parts) + ")")
+            kw_parts = [
+                f'"{k}"' if len(k.split(None, 1)) > 1 else k
+                for k in (k.strip() for k in keywords)
+                if k
+            ]
+            if kw_parts:
+                yield "(" + " OR ".join(kw_parts) + ")"
 
-    if not include_retweets:
-        parts.append("-is:retweet")
+        if not include_retweets:
+            yield "-is:retweet"
 
-    if lang_hint:
-        parts.append(f"lang:{lang_hint}")
+        if lang_hint:
+            yield f"lang:{lang_hint}"
 
-    if geo_point and radius_km:
-        lat, lon = geo_point
-        # point_radius expects lon lat
-        parts.append(f"point_radius:[{lon:.6f} {lat:.6f} {radius_km:.2f}km]")
+        if geo_point and radius_km:
+            lat, lon = geo_point
+            # point_radius expects lon lat
+            yield f"point_radius:[{lon:.6f} {lat:.6f} {radius_km:.2f}km]"
 
     # Fallback if query is empty (should not happen in normal use)
-    if not parts:
-        parts.append("(*)")
-
-    return " ".join(parts)
+    return " ".join(_parts()) or "(*)"
 
 
 # -----------------------
 # Function 1: get_tweet
 # -----------------------
+# Field lists requested from the search endpoint (fixed, so joined once at import)
+TWEET_FIELDS = ",".join([
+    "id",
+    "text",
+    "created_at",
+    "lang",
+    "author_id",
+    "conversation_id",
+    "public_metrics",
+    "entities",
+    "geo",
+    "context_annotations",
+    "referenced_tweets",
+    "source",
+])
+USER_FIELDS = ",".join(["id", "name", "username", "verified", "public_metrics", "created_at", "entities"])
+PLACE_FIELDS = ",".join(["id", "full_name", "name", "country", "country_code", "geo", "place_type"])
+SEARCH_EXPANSIONS = "author_id,geo.place_id"
+
 def get_tweet(
+    number: int,
+    hashtag: Optional[str] = None,
+    location: Optional[Union[str, Dict[str, str]]] = None,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Blocking wrapper around get_tweet_async(); takes the same parameters and returns the same format.
+    """
+    async def _run() -> List[Dict[str, Any]]:
+        try:
+            return await get_tweet_async(number, hashtag, location, **kwargs)
+        finally:
+            await close_session()
+
+    return asyncio.run(_run())
+
+
+def get_tweets_concurrently(
+    queries: Sequence[Dict[str, Any]],
+    *,
+    bearer_token: Optional[str] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run several get_tweet_async() searches in parallel and return their results in order.
+
+    Each entry of `queries` holds the keyword arguments for one get_tweet_async() call
+    (e.g. {"number": 10, "hashtag": "flood"}). All searches share one TwitterClient, so
+    token rotation state is shared too.
+    """
+    async def _run() -> List[List[Dict[str, Any]]]:
+        client = TwitterClient(bearer_token=bearer_token)
+        try:
+            return list(await asyncio.gather(*(get_tweet_async(**q, client=client) for q in queries)))
+        finally:
+            await close_session()
+
+    return asyncio.run(_run())
+
+
+async def get_tweet_async(
     number: int,
     hashtag: Optional[str] = None,
     location: Optional[Union[str, Dict[str, str]]] = None,
@@ -492,6 +956,9 @@ def get_tweet(
     lang_hint: Optional[str] = None,
     bearer_token: Optional[str] = None,
     log_level: int = logging.INFO,
+    client: Optional[TwitterClient] = None,
+    use_cache: bool = True,
+    cache_ttl: float = DEFAULT_CACHE_TTL,
 ) -> List[Dict[str, Any]]:
     """
     Fetch up to `number` tweets using X (Twitter) v2 Recent Search.
@@ -534,6 +1001,9 @@ def get_tweet(
         lang_hint: Optional operator hint like "en". This does not replace preprocessing.
         bearer_token: If not provided, the function will use env var TWITTER_BEARER_TOKEN.
         log_level: Logging verbosity.
+        client: Existing TwitterClient to reuse (bearer_token is ignored when given).
+        use_cache: Serve an identical search from logs/cache if it is younger than cache_ttl seconds.
+        cache_ttl: Cache lifetime in seconds (default 1 hour).
 
     Returns:
         List of tweet dicts as described in the format above.
@@ -544,7 +1014,7 @@ def get_tweet(
     LOGGER.info("Additional params: keywords=%s, geo_point=%s, radius_km=%s, include_retweets=%s",
                 keywords, geo_point, radius_km, include_retweets)
     
-    client = TwitterClient(bearer_token=bearer_token)
+    client = client or TwitterClient(bearer_token=bearer_token)
 
     query = build_search_query(
         hashtag=hashtag,
@@ -557,23 +1027,6 @@ def get_tweet(
     
     LOGGER.info("Built search query: %s", query)
 
-    tweet_fields = [
-        "id",
-        "text",
-        "created_at",
-        "lang",
-        "author_id",
-        "conversation_id",
-        "public_metrics",
-        "entities",
-        "geo",
-        "context_annotations",
-        "referenced_tweets",
-        "source",
-    ]
-    user_fields = ["id", "name", "username", "verified", "public_metrics", "created_at", "entities"]
-    place_fields = ["id", "full_name", "name", "country", "country_code", "geo", "place_type"]
-
     # Conservative: limit max_results to requested number, cap at 10 by default for safety
     # Free tier has monthly tweet caps, so be very conservative
     actual_max = min(number, 10)  # Cap at 10 tweets per request to preserve monthly quota
@@ -581,10 +1034,10 @@ def get_tweet(
     params = {
         "query": query,
         "max_results": actual_max,
-        "expansions": "author_id,geo.place_id",
-        "tweet.fields": ",".join(tweet_fields),
-        "user.fields": ",".join(user_fields),
-        "place.fields": ",".join(place_fields),
+        "expansions": SEARCH_EXPANSIONS,
+        "tweet.fields": TWEET_FIELDS,
+        "user.fields": USER_FIELDS,
+        "place.fields": PLACE_FIELDS,
     }
     
     LOGGER.info("Requesting max_results=%d (requested %d tweets total)", actual_max, number)
@@ -610,7 +1063,7 @@ def get_tweet(
 
     # Make a single API call (no pagination)
     LOGGER.info("Fetching tweets from API endpoint: %s", path)
-    payload = client.get(path, params)
+    payload = await client.aget(path, params, use_cache=use_cache, cache_ttl=cache_ttl)
     data = payload.get("data", [])
     includes = payload.get("includes", {})
     users = {u["id"]: u for u in includes.get("users", [])}
@@ -622,31 +1075,8 @@ def get_tweet(
 
     filtered_count = 0
     for t in data:
-            author = users.get(t.get("author_id"))
-            place_obj = None
-            if t.get("geo", {}).get("place_id"):
-                place_obj = places.get(t["geo"]["place_id"])
-
-            record = {
-                "id": t["id"],
-                "text": t.get("text", ""),
-                "created_at": t.get("created_at"),
-                "lang": t.get("lang"),
-                "author_id": t.get("author_id"),
-                "author_username": author["username"] if author else None,
-                "conversation_id": t.get("conversation_id"),
-                "public_metrics": t.get("public_metrics", {}),
-                "entities": t.get("entities"),
-                "geo": t.get("geo"),
-                "place": place_obj,
-                "referenced_tweets": t.get("referenced_tweets"),
-                "context_annotations": t.get("context_annotations"),
-                "raw": {
-                    "tweet": t,
-                    "author": author,
-                    "place": place_obj,
-                },
-            }
+            geo = t.get("geo")
+            place_obj = places.get(geo["place_id"]) if geo and geo.get("place_id") else None
 
             # Optional post-filter by place information
             if location:
@@ -681,6 +1111,29 @@ def get_tweet(
                         LOGGER.debug("Filtered tweet %s: location filter not satisfied", t["id"])
                         continue
 
+            author = users.get(t.get("author_id"))
+            record = {
+                "id": t["id"],
+                "text": t.get("text", ""),
+                "created_at": t.get("created_at"),
+                "lang": t.get("lang"),
+                "author_id": t.get("author_id"),
+                "author_username": author["username"] if author else None,
+                "conversation_id": t.get("conversation_id"),
+                "public_metrics": t.get("public_metrics", {}),
+                "entities": t.get("entities"),
+                "geo": geo,
+                "place": place_obj,
+                "referenced_tweets": t.get("referenced_tweets"),
+                "context_annotations": t.get("context_annotations"),
+                # References into the payload, not copies; nothing downstream mutates them
+                "raw": {
+                    "tweet": t,
+                    "author": author,
+                    "place": place_obj,
+                },
+            }
+
             out.append(record)
             if len(out) >= number:
                 break
@@ -698,7 +1151,6 @@ URL_RE = re.compile(r"https?://\S+|www\.\S+", re.IGNORECASE)
 MENTION_RE = re.compile(r"(?<!\w)@([A-Za-z0-9_]{1,15})")
 HASHTAG_RE = re.compile(r"(?<!\w)#([A-Za-z0-9_]+)")
 RT_PREFIX_RE = re.compile(r"^RT\s+@[\w_]+:\s*", re.IGNORECASE)
-CONTROL_CHARS_RE = re.compile(r"[\u0000-\u001F\u007F-\u009F]")
 
 # Emoji ranges (commonly used blocks)
 EMOJI_RANGES = [
@@ -717,51 +1169,70 @@ EMOJI_RANGES = [
 ALLOWED_PUNCT = r"""!\"#$%&'()*+,\-./:;<=>?@[\]^_`{|}~"""
 
 
-def _is_allowed_char(ch: str) -> bool:
+def _allowed_codepoints() -> Iterable[int]:
     """
+    Yield every code point kept by the character filter; this is the single source of its tables.
+
     Keep:
     - ASCII letters and digits
-    - ASCII-like punctuation and whitespace
+    - ASCII-like punctuation, space and tab
     - Emoji ranges defined above
 
-    Drop:
+    Drop (everything else):
     - Characters from non-Latin scripts (e.g., CJK, Cyrillic, etc.)
     - Control characters
 
     Note: This intentionally removes non-English scripts. Accented Latin (é, ñ) are removed as well.
     Adjust as needed for your use case.
     """
-    o = ord(ch)
-    # ASCII letters/digits
-    if 0x30 <= o <= 0x39 or 0x41 <= o <= 0x5A or 0x61 <= o <= 0x7A:
-        return True
-    # Whitespace
-    if ch in (" ", "\t"):
-        return True
-    # ASCII-like punctuation
-    if ch in ALLOWED_PUNCT:
-        return True
-    # Emoji blocks
+    yield from range(0x30, 0x3A)
+    yield from range(0x41, 0x5B)
+    yield from range(0x61, 0x7B)
+    yield 0x20
+    yield 0x09
+    yield from map(ord, ALLOWED_PUNCT)
     for lo, hi in EMOJI_RANGES:
-        if ord(lo) <= o <= ord(hi):
-            return True
-    return False
+        yield from range(ord(lo), ord(hi) + 1)
+
+
+def _astral_disallowed_ranges() -> Iterable[Tuple[int, int]]:
+    """Yield (lo, hi) code point ranges above the BMP that are not covered by EMOJI_RANGES."""
+    lo = 0x10000
+    for start, end in sorted((ord(a), ord(b)) for a, b in EMOJI_RANGES if ord(a) > 0xFFFF):
+        if start > lo:
+            yield lo, start - 1
+        lo = max(lo, end + 1)
+    if lo <= 0x10FFFF:
+        yield lo, 0x10FFFF
+
+
+# Precomputed once at import: every disallowed BMP code point (including control chars) maps
+# to a space, so filtering is a single C-level str.translate pass. Code points above the BMP
+# are rare and handled by one regex over the non-emoji astral ranges. The table starts as
+# "everything disallowed" (built in C by dict.fromkeys) and the few allowed code points are
+# removed, rather than testing all 65k code points at import.
+_TRANSLATE_BMP = dict.fromkeys(range(0x10000), 0x20)
+for _cp in _allowed_codepoints():
+    if _cp <= 0xFFFF:
+        _TRANSLATE_BMP.pop(_cp, None)
+del _cp
+_ASTRAL_DISALLOWED_RE = re.compile(
+    "[" + "".join(f"{chr(lo)}-{chr(hi)}" for lo, hi in _astral_disallowed_ranges()) + "]"
+)
 
 
 def _strip_non_english_keep_emoji(text: str) -> str:
-    # Remove control chars first
-    text = CONTROL_CHARS_RE.sub(" ", text)
-    chars = []
-    for ch in text:
-        if _is_allowed_char(ch):
-            chars.append(ch)
-        else:
-            # Replace disallowed characters with space to avoid word gluing
-            chars.append(" ")
-    out = "".join(chars)
-    # Collapse whitespace
-    out = re.sub(r"\s+", " ", out).strip()
-    return out
+    # Replace disallowed characters with space to avoid word gluing
+    out = text.translate(_TRANSLATE_BMP)
+    if not out.isascii():
+        out = _ASTRAL_DISALLOWED_RE.sub(" ", out)
+    # Collapse whitespace (str.split() also drops leading/trailing whitespace)
+    return " ".join(out.split())
+
+
+def _literal_repl(value: Optional[str]) -> str:
+    """Escape a replacement so re.sub inserts it verbatim (None means remove)."""
+    return value.replace("\\", "\\\\") if value else ""
 
 
 def preprocess(
@@ -817,7 +1288,7 @@ def preprocess(
 
     Examples of characters removed when strip_non_english=True:
         - Japanese Kanji/Hiragana/Katakana, Chinese Han, Cyrillic, Arabic, etc.
-        - Accented Latin letters (é ñ) will also be removed (strict English-only). Adjust _is_allowed_char if needed.
+        - Accented Latin letters (é ñ) will also be removed (strict English-only). Adjust _allowed_codepoints if needed.
     """
     if isinstance(tweet, dict):
         raw_text = tweet.get("text", "")
@@ -839,51 +1310,43 @@ def preprocess(
     if not raw_text:
         return None
 
-    # Normalize and unescape HTML entities
-    txt = unicodedata.normalize("NFC", raw_text)
-    txt = html_unescape(txt)
+    # Normalize and unescape HTML entities (both are no-ops for plain ASCII / entity-free text).
+    # is_normalized() is the cheap Unicode quick check, so already-NFC text is not rebuilt.
+    if raw_text.isascii() or unicodedata.is_normalized("NFC", raw_text):
+        txt = raw_text
+    else:
+        txt = unicodedata.normalize("NFC", raw_text)
+    if "&" in txt:
+        txt = html_unescape(txt)
 
     # Remove RT prefix
     if remove_rt_prefix:
-        txt = RT_PREFIX_RE.sub("", txt)
-
-    # URLs
-    if replace_urls_with is None:
-        txt = URL_RE.sub("", txt)
-    else:
-        txt = URL_RE.sub(replace_urls_with, txt)
-
-    # Mentions
-    def _mention_sub(m: re.Match) -> str:
-        handle = m.group(0)
-        if keep_mentions:
-            return handle
-        if replace_mentions_with is None:
-            return ""
-        return replace_mentions_with
-
-    txt = MENTION_RE.sub(_mention_sub, txt)
-
-    # Hashtags
-    def _hashtag_sub(m: re.Match) -> str:
-        tag = m.group(0)
-        if keep_hashtags:
-            return tag
+        txt = RT_PREFIX_RE.sub("", txt, count=1)
+
+    # URLs, mentions and hashtags: every keep/replace choice is known up front, so each pass is a
+    # plain literal/template substitution done in C (no Python callback per match), and passes
+    # that would keep every match are skipped. This measured ~2x faster than one fused
+    # alternation with a callback.
+    txt = URL_RE.sub(_literal_repl(replace_urls_with), txt)
+    if not keep_mentions:
+        txt = MENTION_RE.sub(_literal_repl(replace_mentions_with), txt)
+    if not keep_hashtags:
         # strip '#' but keep token
-        return m.group(1)
-
-    txt = HASHTAG_RE.sub(_hashtag_sub, txt)
+        txt = HASHTAG_RE.sub(r"\1", txt)
 
     # Lowercase
     if lower:
         txt = txt.lower()
 
-    # Strip non-English scripts but keep emoji (per _is_allowed_char)
-    if strip_non_english:
-        txt = _strip_non_english_keep_emoji(txt)
-
-    # Cleanup whitespace and drop too-short
-    txt = re.sub(r"\s+", " ", txt).strip()
+    # Strip non-English scripts but keep emoji (per _allowed_codepoints)
+    # Cleanup whitespace (the non-English filter already collapses it) and drop too-short.
+    # Neither cleanup pass lengthens the text, so text that is already too short skips them.
+    # (Earlier steps can lengthen it, e.g. "@a" -> "@user", so the raw length is no bound.)
+    if len(txt) >= min_len:
+        if strip_non_english:
+            txt = _strip_non_english_keep_emoji(txt)
+        else:
+            txt = " ".join(txt.split())
     if len(txt) < min_len:
         if log_preprocessing:
             LOGGER.debug("Dropped tweet %s: clean_text too short (%d < %d)", tw_id, len(txt), min_len)
@@ -903,6 +1366,30 @@ def preprocess(
     return result
 
 
+# Below this many tweets, process start-up costs more than preprocess() itself
+PREPROCESS_PARALLEL_MIN = 2000
+
+
+def preprocess_many(
+    tweets: Sequence[Union[str, Dict[str, Any]]],
+    processes: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterable[Optional[Dict[str, Any]]]:
+    """
+    Yield preprocess(tweet, **kwargs) for each tweet, in input order.
+
+    Large batches (>= PREPROCESS_PARALLEL_MIN) are spread over a process pool of
+    `processes` workers (default: os.cpu_count()); smaller ones run inline.
+    """
+    func = partial(preprocess, **kwargs)
+    if len(tweets) < PREPROCESS_PARALLEL_MIN or processes == 1:
+        yield from map(func, tweets)
+        return
+    chunksize = max(64, len(tweets) // ((processes or os.cpu_count() or 1) * 4))
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(func, tweets, chunksize=chunksize)
+
+
 # -----------------------
 # Function 3: get_label
 # -----------------------
@@ -928,6 +1415,162 @@ def get_label(tweet: Union[str, Dict[str, Any]], *args, **kwargs) -> bool:
 # -----------------------
 # Function 4: save_tweets
 # -----------------------
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _scan_jsonl_index(path: Path, key_field: str) -> Dict[str, Any]:
+    """Rebuild the key -> [offset, length] index by scanning the JSONL file (last record per key wins)."""
+    offsets: Dict[str, List[int]] = {}
+    size = 0
+    if path.exists():
+        LOGGER.info("Indexing existing tweets in %s", path)
+        with path.open("rb") as f:
+            for line_num, line in enumerate(f, 1):
+                offset, size = size, size + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    obj = _loads(line)
+                except ValueError:
+                    LOGGER.warning("Skipping corrupt line %d in %s", line_num, path)
+                    continue
+                k = obj.get(key_field) if isinstance(obj, dict) else None
+                if k is not None:
+                    offsets[str(k)] = [offset, len(line)]
+    live = sum(length for _, length in offsets.values())
+    # "rebuilt" tells save_tweets to write the sidecar in full instead of appending to it
+    return {"key_field": key_field, "size": size, "live": live, "offsets": offsets, "rebuilt": True}
+
+
+# Indexes from earlier saves in this process, keyed by resolved data path. An entry is only
+# trusted while the data file's (mtime_ns, size) still match what save_tweets left behind.
+_INDEX_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def _file_sig(path: Path) -> Tuple[int, int]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_jsonl_index(path: Path, key_field: str) -> Dict[str, Any]:
+    """Load the sidecar index, rebuilding it if it is missing or does not match the data file."""
+    # Take the cached index out while it is being modified; save_tweets puts it back on success
+    cached = _INDEX_CACHE.pop(path.resolve(), None)
+    if cached is not None and cached[0] == _file_sig(path) and cached[1].get("key_field") == key_field:
+        return cached[1]
+    size = path.stat().st_size if path.exists() else 0
+    idx_path = _index_path(path)
+    if idx_path.exists():
+        try:
+            index = _read_jsonl_index(idx_path)
+            if index and index["key_field"] == key_field and index["size"] == size:
+                return index
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+        LOGGER.info("Index %s is stale; rebuilding", idx_path)
+    return _scan_jsonl_index(path, key_field)
+
+
+# The sidecar is itself append-only JSONL, so a save only writes the keys it touched:
+#   {"key_field": "id"}            header
+#   ["<key>", offset, length]      one line per key written by a save
+#   {"size": ..., "live": ...}     commit line closing each save
+# Entries after the last commit line (an interrupted save) are ignored.
+def _read_jsonl_index(idx_path: Path) -> Optional[Dict[str, Any]]:
+    index: Optional[Dict[str, Any]] = None
+    pending: Dict[str, List[int]] = {}
+    with idx_path.open("rb") as f:
+        header = _loads(f.readline())
+        if not isinstance(header, dict) or "key_field" not in header:
+            return None
+        index = {"key_field": header["key_field"], "size": 0, "live": 0, "offsets": {}}
+        for line in f:
+            entry = _loads(line)
+            if isinstance(entry, list):
+                k, offset, length = entry
+                pending[k] = [offset, length]
+            else:
+                index["offsets"].update(pending)
+                pending.clear()
+                index["size"] = entry["size"]
+                index["live"] = entry["live"]
+    return index
+
+
+def _index_lines(offsets: Dict[str, List[int]], keys: Iterable[str], size: int, live: int) -> bytes:
+    lines = [_dumpb([k, *offsets[k]]) for k in keys]
+    lines.append(_dumpb({"size": size, "live": live}))
+    return b"\n".join(lines) + b"\n"
+
+
+def _write_jsonl_index(path: Path, index: Dict[str, Any]) -> None:
+    """Rewrite the whole sidecar (after a rebuild or compaction)."""
+    idx_path = _index_path(path)
+    with NamedTemporaryFile("wb", dir=str(path.parent), delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+        tmp.write(_dumpb({"key_field": index["key_field"]}) + b"\n")
+        tmp.write(_index_lines(index["offsets"], index["offsets"], index["size"], index["live"]))
+    tmp_path.replace(idx_path)
+
+
+def _append_jsonl_index(path: Path, index: Dict[str, Any], keys: Iterable[str]) -> None:
+    """Append the entries for `keys` plus a commit line; O(keys), not O(index)."""
+    with _index_path(path).open("ab") as f:
+        f.write(_index_lines(index["offsets"], keys, index["size"], index["live"]))
+
+
+def _compact_jsonl(path: Path, index: Dict[str, Any], atomic: bool) -> None:
+    """Rewrite the file with only the live record for each key and re-point the index."""
+    offsets: Dict[str, List[int]] = index["offsets"]
+    with path.open("rb") as f:
+        data = f.read()
+    new_offsets: Dict[str, List[int]] = {}
+    chunks: List[bytes] = []
+    pos = 0
+    for k, (offset, length) in sorted(offsets.items(), key=lambda kv: kv[1][0]):
+        line = data[offset:offset + length]
+        if not line.endswith(b"\n"):
+            line += b"\n"
+        chunks.append(line)
+        new_offsets[k] = [pos, len(line)]
+        pos += len(line)
+    del data
+
+    payload = b"".join(chunks)
+    del chunks
+    if atomic:
+        LOGGER.debug("Using atomic write via temporary file")
+        # One preallocated buffer, written with as few syscalls as the kernel allows and synced
+        # before the rename. Opened with 0o644 (not NamedTemporaryFile's 0o600) so the rename
+        # does not change the file's permissions.
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if payload and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, len(payload))
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        except BaseException:
+            os.close(fd)
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.close(fd)
+        os.replace(tmp_path, path)
+    else:
+        LOGGER.debug("Using direct write (non-atomic)")
+        with path.open("wb") as f:
+            f.write(payload)
+    index["offsets"] = new_offsets
+    index["size"] = pos
+    index["live"] = pos
+
+
 def save_tweets(
     storage_path: Union[str, Path],
     tweets_with_label: Sequence[Dict[str, Any]],
@@ -936,6 +1579,7 @@ def save_tweets(
     atomic: bool = True,
     log_level: int = logging.INFO,
     log_details: bool = True,
+    compact_ratio: float = 0.5,
 ) -> None:
     """
     Save labeled tweets to a JSONL file, keyed by `key_field`. On duplication:
@@ -943,8 +1587,19 @@ def save_tweets(
     - Emits a warning.
 
     Behavior:
-        - If file exists, it is fully read and merged with new tweets by key.
-        - If atomic=True, writes to a temp file and then renames for crash safety.
+        - New and updated records are appended to the file; a sidecar index
+          (<storage_path>.idx) maps each key to the byte offset of its live record.
+          The sidecar is append-only too (only the keys a save touched are written),
+          so a save costs O(new tweets), not O(file size), apart from compaction,
+          index rebuilds and the first load of the index in a process.
+        - A replaced record stays in the file until compaction. Readers that bypass the
+          index should treat the last line for a key as authoritative.
+        - When superseded/corrupt lines exceed `compact_ratio` of the file, it is rewritten
+          with one line per key. If atomic=True, that rewrite goes to a temp file which is
+          then renamed for crash safety.
+        - The index is kept in memory between calls, so repeated saves in one process skip
+          re-reading it while the file's mtime and size are unchanged.
+        - A missing or stale index (e.g. the file was edited by hand) is rebuilt by scanning the file.
         - File encoding is UTF-8. One JSON object per line.
 
     Each stored record is expected to contain:
@@ -959,7 +1614,8 @@ def save_tweets(
         storage_path: File path to JSONL.
         tweets_with_label: Iterable of tweet dicts including labels.
         key_field: Unique identifier field (default "id").
-        atomic: Use atomic write via temp file+rename.
+        atomic: Use atomic write via temp file+rename when compacting.
+        compact_ratio: Fraction of dead bytes that triggers compaction.
     """
     LOGGER.setLevel(log_level)
     path = Path(storage_path)
@@ -967,25 +1623,22 @@ def save_tweets(
     
     LOGGER.info("Saving tweets to %s", path)
 
-    existing: Dict[str, Dict[str, Any]] = {}
-    if path.exists():
-        LOGGER.info("Loading existing tweets from %s", path)
-        with path.open("r", encoding="utf-8") as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                except json.JSONDecodeError:
-                    LOGGER.warning("Skipping corrupt line %d in %s", line_num, path)
-                    continue
-                k = obj.get(key_field)
-                if k is not None:
-                    existing[str(k)] = obj
-        LOGGER.info("Loaded %d existing tweets", len(existing))
-
-    # Merge
+    index = _load_jsonl_index(path, key_field)
+    offsets: Dict[str, List[int]] = index["offsets"]
+    LOGGER.info("Indexed %d existing tweets", len(offsets))
+
+    # Merge: encode each new record and point its key at where it will land in the file
+    size = index["size"]
+    live = index["live"]
+    written: Dict[str, None] = {}  # keys touched by this save, in order, for the index append
+    chunks: List[bytes] = []
+    if size and path.exists():
+        with path.open("rb") as f:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                # Previous write was cut short; don't glue the next record onto it
+                chunks.append(b"\n")
+                size += 1
     updates = 0
     adds = 0
     for tw in tweets_with_label:
@@ -994,34 +1647,41 @@ def save_tweets(
             LOGGER.warning("Tweet missing key_field '%s'; skipping", key_field)
             continue
         k = str(k)
-        if k in existing:
+        if k in offsets:
             if log_details:
                 LOGGER.debug("Duplicate key '%s' found; replacing old record", k)
             updates += 1
+            live -= offsets[k][1]
         else:
             if log_details:
                 LOGGER.debug("Adding new tweet with key '%s'", k)
             adds += 1
-        existing[k] = tw
-
-    records = list(existing.values())
-    LOGGER.info("Saving %d records to %s (adds=%d, updates=%d)", len(records), str(path), adds, updates)
-
-    if atomic:
-        LOGGER.debug("Using atomic write via temporary file")
-        with NamedTemporaryFile("w", dir=str(path.parent), delete=False, encoding="utf-8", newline="\n") as tmp:
-            tmp_path = Path(tmp.name)
-            for obj in records:
-                tmp.write(json.dumps(obj, ensure_ascii=False) + "\n")
-        tmp_path.replace(path)
-        LOGGER.debug("Atomic write completed successfully")
+        line = _dumpb(tw) + b"\n"
+        offsets[k] = [size, len(line)]
+        written[k] = None
+        chunks.append(line)
+        size += len(line)
+        live += len(line)
+
+    LOGGER.info("Appending %d records to %s (adds=%d, updates=%d)", adds + updates, str(path), adds, updates)
+    if chunks:
+        with path.open("ab") as f:
+            f.write(b"".join(chunks))
+    index["size"] = size
+    index["live"] = live
+
+    rewrite_index = index.pop("rebuilt", False) or not _index_path(path).exists()
+    if size and (size - live) / size > compact_ratio:
+        LOGGER.info("Compacting %s (%d of %d bytes are superseded)", path, size - live, size)
+        _compact_jsonl(path, index, atomic)
+        rewrite_index = True
+    if rewrite_index:
+        _write_jsonl_index(path, index)
     else:
-        LOGGER.debug("Using direct write (non-atomic)")
-        with path.open("w", encoding="utf-8", newline="\n") as f:
-            for obj in records:
-                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        _append_jsonl_index(path, index, written)
+    _INDEX_CACHE[path.resolve()] = (_file_sig(path), index)
     
-    LOGGER.info("Successfully saved %d tweets to %s", len(records), path)
+    LOGGER.info("Successfully saved %d tweets to %s (%d total)", adds + updates, path, len(offsets))
 
 
 # -----------------------
@@ -1089,8 +1749,8 @@ def ingest_tweets(
     preprocessing_dropped = 0
     labeling_dropped = 0
     
-    for i, t in enumerate(raw_tweets, 1):
-        p = preprocess(t, log_preprocessing=(log_level <= logging.DEBUG))
+    preprocessed = preprocess_many(raw_tweets, log_preprocessing=(log_level <= logging.DEBUG))
+    for i, (t, p) in enumerate(zip(raw_tweets, preprocessed), 1):
         if not p:
             preprocessing_dropped += 1
             continue
@@ -1,20 +1,56 @@
 """
 CSV to Database Import Script for Crisis Monitor
 Reads _instance.csv and sends each tweet to the backend API for classification and storage.
-Processes tweets one by one sequentially.
+Tweets are sent concurrently from one asyncio loop over a shared HTTP/2 client, capped by a client-side rate limit.
 """
 
+import asyncio
 import csv
-import requests
+import itertools
+import httpx
+import random
 import time
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 
 
 # Configuration
 API_URL = os.getenv("NEXT_PUBLIC_API_URL", "")  # Update with your deployed backend URL
 CSV_FILE = "data/crisis_example.csv"
-DELAY_BETWEEN_REQUESTS = 0.5  # seconds to wait between requests
+MAX_WORKERS = int(os.getenv("IMPORT_WORKERS", "16"))  # concurrent requests in flight
+MAX_REQUESTS_PER_SECOND = float(os.getenv("IMPORT_RPS", "20"))  # client-side rate limit
+MAX_RETRIES = int(os.getenv("IMPORT_RETRIES", "5"))  # retries per tweet on 429/5xx/connection errors
+MAX_BACKOFF_S = 30.0  # upper bound on any single retry wait, including the server's Retry-After
+# Failures where the request never reached the server; anything later may have been processed already
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RateLimiter:
+    """
+    Token bucket for a single event loop: allows bursts of up to `rate` requests, refilling at `rate` per second.
+    """
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        # No lock needed: the bookkeeping below never yields to the event loop
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+def make_client(pool_size: int = MAX_WORKERS) -> httpx.AsyncClient:
+    """
+    Create a keep-alive client sized for the number of workers.
+    HTTPS backends negotiate HTTP/2, so concurrent requests share one connection.
+    """
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    return httpx.AsyncClient(http2=True, timeout=30, limits=limits)
 
 
 def read_csv_file(file_path: str) -> list[Dict[str, Any]]:
@@ -23,61 +59,98 @@ def read_csv_file(file_path: str) -> list[Dict[str, Any]]:
     Assumes CSV has a 'text' column with the tweet content.
     Adjust column names as needed based on your CSV structure.
     """
-    tweets = []
+    tweets = list(iter_csv_file(file_path))
+    print(f"✓ Loaded {len(tweets)} rows from {file_path}")
+    return tweets
+
+
+def iter_csv_file(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the CSV rows as dictionaries one at a time, so the file is never held in memory.
+    Errors are reported and end the iteration.
+    """
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                tweets.append(row)
-        print(f"✓ Loaded {len(tweets)} rows from {file_path}")
-        return tweets
+            yield from csv.DictReader(f)
     except FileNotFoundError:
         print(f"✗ Error: File '{file_path}' not found!")
-        return []
     except Exception as e:
         print(f"✗ Error reading CSV: {e}")
-        return []
 
 
-def send_tweet_to_api(tweet_text: str, api_url: str) -> Dict[str, Any] | None:
+def _backoff_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """
+    Seconds to wait before retry `attempt`: the server's Retry-After if given, else exponential with jitter,
+    capped at MAX_BACKOFF_S either way.
+    """
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    if retry_after.isdigit():
+        return min(MAX_BACKOFF_S, float(retry_after))
+    return min(MAX_BACKOFF_S, 0.1 * 2 ** attempt) + random.random() * 0.1
+
+
+async def send_tweet_to_api(
+    tweet_text: str, api_url: str, client: httpx.AsyncClient, max_retries: int = MAX_RETRIES
+) -> Dict[str, Any] | None:
     """
     Send a single tweet to the backend API for classification.
+    Rate-limited (429), server (5xx) and connection errors are retried with backoff;
+    there is no delay at all while the backend keeps up. Read/write timeouts are not retried,
+    since the tweet may already have been classified and stored.
     Returns the API response or None if failed.
     """
     endpoint = f"{api_url}/predict-tweet"
     payload = {"text": tweet_text}
     
-    try:
-        response = requests.post(endpoint, json=payload, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"  ✗ API Error: {e}")
-        return None
+    for attempt in range(max_retries + 1):
+        try:
+            response = await client.post(endpoint, json=payload)
+            if attempt < max_retries and (response.status_code == 429 or response.status_code >= 500):
+                await asyncio.sleep(_backoff_delay(attempt, response))
+                continue
+            response.raise_for_status()
+            return response.json()
+        except RETRYABLE_ERRORS as e:
+            if attempt < max_retries:
+                await asyncio.sleep(_backoff_delay(attempt))
+                continue
+            print(f"  ✗ API Error: {e}")
+            return None
+        except httpx.HTTPError as e:
+            print(f"  ✗ API Error: {e}")
+            return None
+    return None
 
 
-def process_csv_to_database(csv_file: str, api_url: str, delay: float = 0.5):
+def process_csv_to_database(
+    csv_file: str,
+    api_url: str,
+    rate: float = MAX_REQUESTS_PER_SECOND,
+    workers: int = MAX_WORKERS,
+):
     """
     Main function to process CSV and send each row to the database via API.
+    Up to `workers` requests run at once, started at no more than `rate` per second.
     """
     print("=" * 70)
     print("🚀 Crisis Monitor - CSV Import Script")
     print("=" * 70)
     print(f"📁 CSV File: {csv_file}")
     print(f"🌐 API URL: {api_url}")
-    print(f"⏱️  Delay: {delay}s between requests")
+    print(f"⏱️  Concurrency: {workers} workers, max {rate:g} requests/s")
     print("=" * 70)
     print()
     
-    # Read CSV
-    rows = read_csv_file(csv_file)
-    if not rows:
+    # Stream the CSV; only the first row is peeked at to find the text column
+    rows = iter_csv_file(csv_file)
+    sample_row = next(rows, None)
+    if sample_row is None:
         print("❌ No data to process. Exiting.")
         return
+    rows = itertools.chain([sample_row], rows)
     
     # Determine the column name for tweet text
     # Common column names: 'text', 'tweet', 'cleaned_tweet', 'content'
-    sample_row = rows[0]
     text_column = None
     for col in ['text', 'tweet', 'cleaned_tweet', 'content', 'message']:
         if col in sample_row:
@@ -92,26 +165,52 @@ def process_csv_to_database(csv_file: str, api_url: str, delay: float = 0.5):
     print(f"📝 Using column '{text_column}' for tweet text\n")
     
     # Process each row
-    total = len(rows)
+    start_time = time.time()
+    total, successful, failed = asyncio.run(_send_rows(rows, text_column, api_url, rate, workers))
+    
+    # Summary
+    elapsed_time = time.time() - start_time
+    print()
+    print("=" * 70)
+    print("📊 Import Summary")
+    print("=" * 70)
+    print(f"✅ Successful: {successful}/{total}")
+    print(f"❌ Failed: {failed}/{total}")
+    print(f"⏱️  Total time: {elapsed_time:.2f}s")
+    print(f"⚡ Average: {elapsed_time/total:.2f}s per tweet")
+    print("=" * 70)
+
+
+async def _send_rows(
+    rows: Iterator[Dict[str, Any]],
+    text_column: str,
+    api_url: str,
+    rate: float,
+    workers: int,
+) -> tuple[int, int, int]:
+    """
+    Post every row's text with at most `workers` requests in flight.
+    Returns (total, successful, failed).
+    """
+    total = 0
     successful = 0
     failed = 0
     
-    start_time = time.time()
+    limiter = RateLimiter(rate)
+    slots = asyncio.Semaphore(workers)
     
-    for idx, row in enumerate(rows, 1):
-        tweet_text = row.get(text_column, "").strip()
-        
-        if not tweet_text:
-            print(f"[{idx}/{total}] ⚠️  Skipping empty row")
-            failed += 1
-            continue
+    async def _send(idx: int, tweet_text: str) -> None:
+        nonlocal successful, failed
+        try:
+            # Rate limit is applied when a request starts, not as a fixed sleep between rows
+            await limiter.acquire()
+            result = await send_tweet_to_api(tweet_text, api_url, client)
+        finally:
+            slots.release()
         
         # Truncate display text for readability
         display_text = tweet_text[:60] + "..." if len(tweet_text) > 60 else tweet_text
-        print(f"[{idx}/{total}] 📤 Processing: {display_text}")
-        
-        # Send to API
-        result = send_tweet_to_api(tweet_text, api_url)
+        print(f"[{idx}] 📤 Processed: {display_text}")
         
         if result:
             is_disaster = result.get("is_real_disaster", False)
@@ -122,22 +221,27 @@ def process_csv_to_database(csv_file: str, api_url: str, delay: float = 0.5):
         else:
             print("         ❌ Failed to process")
             failed += 1
+    
+    async with make_client(workers) as client:
+        # A row is only read once a slot is free, so memory stays flat for any CSV size
+        tasks: set[asyncio.Task] = set()
+        for idx, row in enumerate(rows, 1):
+            total = idx
+            tweet_text = (row.get(text_column) or "").strip()
+            
+            if not tweet_text:
+                print(f"[{idx}] ⚠️  Skipping empty row")
+                failed += 1
+                continue
+            
+            await slots.acquire()
+            task = asyncio.create_task(_send(idx, tweet_text))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
         
-        # Delay between requests to avoid overwhelming the API
-        if idx < total:
-            time.sleep(delay)
+        await asyncio.gather(*tasks)
     
-    # Summary
-    elapsed_time = time.time() - start_time
-    print()
-    print("=" * 70)
-    print("📊 Import Summary")
-    print("=" * 70)
-    print(f"✅ Successful: {successful}/{total}")
-    print(f"❌ Failed: {failed}/{total}")
-    print(f"⏱️  Total time: {elapsed_time:.2f}s")
-    print(f"⚡ Average: {elapsed_time/total:.2f}s per tweet")
-    print("=" * 70)
+    return total, successful, failed
 
 
 if __name__ == "__main__":
@@ -163,7 +267,7 @@ if __name__ == "__main__":
     
     # Run the import
     try:
-        process_csv_to_database(CSV_FILE, api_url, DELAY_BETWEEN_REQUESTS)
+        process_csv_to_database(CSV_FILE, api_url, MAX_REQUESTS_PER_SECOND, MAX_WORKERS)
     except KeyboardInterrupt:
         print("\n\n⚠️  Import interrupted by user. Exiting...")
     except Exception as e:
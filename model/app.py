@@ -1,22 +1,80 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+import gzip
 from pydantic import BaseModel
-import os, json, tempfile, requests, onnxruntime as ort
-import numpy as np
-from transformers import AutoTokenizer
-import onnx
-import os, re, json, pathlib, numpy as np, torch, wandb
+import os
 from services import start, TextModel
 
 class InPayload(BaseModel):
     text: str
 
+class BatchPayload(BaseModel):
+    texts: list[str]
+
+class GzipRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                body = gzip.decompress(body)
+            self._body = body
+        return self._body
+
+class GzipRoute(APIRoute):
+    # accept gzip-compressed request bodies from the backend
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request):
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return custom_route_handler
+
 app = FastAPI()
+app.router.route_class = GzipRoute
 
 SESSION: TextModel | None = None
 READY = False
 ERROR = None
 
+# Micro-batching: concurrent /predict calls are gathered for up to MAX_BATCH_WAIT_MS and
+# run through the model as one batch
+MAX_BATCH = int(os.getenv("MAX_BATCH", "16"))
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", "5"))
+BATCH_QUEUE: asyncio.Queue | None = None
+
+def run_batch(texts: list[str]):
+    return SESSION.predict_many(texts, 256)
+
+async def batcher():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await BATCH_QUEUE.get()]
+        deadline = loop.time() + MAX_BATCH_WAIT_MS / 1000
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(BATCH_QUEUE.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        texts = [text for text, _ in batch]
+        try:
+            # inference blocks, so it runs in the threadpool; requests keep queueing meanwhile
+            results = await loop.run_in_executor(None, run_batch, texts)
+        except Exception as ex:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(ex)
+            continue
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
@@ -30,11 +88,30 @@ def ready():
     return JSONResponse(status_code=503, content={"ready": False})
 
 @app.post("/predict")
-def predict(payload: InPayload):
+async def predict(payload: InPayload):
     if SESSION == None:
         return { "status": "not ready" }
-    pred, probs = SESSION.predict_one(payload.text, 256)
-    return {"pred": str(pred), "probs": str(probs) }
+    fut = asyncio.get_running_loop().create_future()
+    await BATCH_QUEUE.put((payload.text, fut))
+    pred, probs, p_disaster = await fut
+    return {"pred": str(pred), "probs": str(probs), "p_disaster": p_disaster }
+
+@app.post("/predict_batch")
+def predict_batch(payload: BatchPayload):
+    if SESSION == None:
+        return { "status": "not ready" }
+    # predict_many buckets by length, so one huge request doesn't pad every text to the longest
+    results = [
+        {"pred": str(pred), "probs": str(probs), "p_disaster": p_disaster}
+        for pred, probs, p_disaster in SESSION.predict_many(payload.texts, 256)
+    ]
+    return {"results": results}
+
+@app.on_event("startup")
+async def _start_batcher():
+    global BATCH_QUEUE
+    BATCH_QUEUE = asyncio.Queue()
+    app.state.batcher = asyncio.create_task(batcher())
 
 @app.on_event("startup")
 def _startup():
@@ -1,76 +1,251 @@
-import os, re, json, pathlib, numpy as np, torch, wandb
+import os, re, json, threading, numpy as np
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
 import onnxruntime as ort
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+# torch, transformers and wandb are imported where they are used: together they take seconds
+# to import, and an ONNX deployment never needs torch at all
     
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+BUCKET_SIZE = int(os.getenv("BUCKET_SIZE", "32"))  # texts per padded batch in predict_many
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))  # recent predictions kept by predict_many
 
 class TextModel(ABC):
+    def __init__(self, IDX2LABEL: dict):
+        self.IDX2LABEL = IDX2LABEL
+        # the label names in the probs string never change, so build them once
+        self._probs_prefix = (f"P({IDX2LABEL.get(0,'0')})=", f", P({IDX2LABEL.get(1,'1')})=")
+        # which class is "disaster" depends on the artifact's id2label ("not disaster" must not match)
+        self._disaster_idx = next(
+            (int(i) for i, label in IDX2LABEL.items() if str(label).strip().lower() == "disaster"), 1
+        )
+        # LRU of (normalized text, max_len) -> prediction tuple, shared by the threadpool workers
+        self._results: OrderedDict = OrderedDict()
+        self._results_lock = threading.Lock()
+
     @abstractmethod
     def predict_one(self, text: str, max_len: int):
+        """Returns (label, probs string, P(disaster) as float)."""
         pass
 
+    def predict_many(self, texts: list[str], max_len: int = 256):
+        """Returns predict_one's tuple for each text, in input order.
+
+        Repeated texts (retweets, CSV-import retries) are answered from an LRU of recent
+        predictions keyed by the normalized text; only the rest reach the model."""
+        keys = [(normalize_tweet(t), max_len) for t in texts]
+        results = [None] * len(texts)
+        with self._results_lock:
+            for i, key in enumerate(keys):
+                hit = self._results.get(key)
+                if hit is not None:
+                    self._results.move_to_end(key)
+                    results[i] = hit
+        # duplicates within one request are only predicted once
+        misses: dict = {}
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                misses.setdefault(key, []).append(i)
+        if not misses:
+            return results
+
+        # normalize_tweet is idempotent, so the normalized texts can go straight back in
+        computed = self._predict_uncached([text for text, _ in misses], max_len)
+        with self._results_lock:
+            for (key, indexes), result in zip(misses.items(), computed):
+                for i in indexes:
+                    results[i] = result
+                self._results[key] = result
+            while len(self._results) > PREDICT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return results
+
+    def _result(self, pred: int, probs) -> tuple:
+        """predict_one's (label, probs string, P(disaster)) tuple from the argmax and class probabilities."""
+        p0, p1 = self._probs_prefix
+        return self.IDX2LABEL.get(pred, pred), f"{p0}{probs[0]:.3f}{p1}{probs[1]:.3f}", float(probs[self._disaster_idx])
+
+    def _predict_uncached(self, texts: list[str], max_len: int):
+        """Texts are sorted by length and run in buckets of BUCKET_SIZE, so each bucket is
+        only padded to its own longest text rather than the longest of the whole request."""
+        if len(texts) <= BUCKET_SIZE:
+            return self.predict_batch(texts, max_len)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        buckets = [order[start:start + BUCKET_SIZE] for start in range(0, len(order), BUCKET_SIZE)]
+        results = [None] * len(texts)
+        batches = ([texts[i] for i in bucket] for bucket in buckets)
+        for bucket, bucket_results in zip(buckets, self.predict_stream(batches, max_len)):
+            for i, result in zip(bucket, bucket_results):
+                results[i] = result
+        return results
+
+    def predict_stream(self, batches: Iterable[list[str]], max_len: int = 256) -> Iterator[list]:
+        """Yields predict_batch's results for each batch of texts, in order."""
+        for batch in batches:
+            yield self.predict_batch(batch, max_len)
+
+    def predict_batch(self, texts: list[str], max_len: int = 256):
+        """One forward over `texts`; subclasses override this with a real batched call."""
+        return [self.predict_one(text, max_len) for text in texts]
+
 # Light tweet normalization (same as training)
+URL_RE  = re.compile(r"https?://\S+|www\.\S+")
+USER_RE = re.compile(r"@\w+")
+WS_RE   = re.compile(r"\s+")
+
 def normalize_tweet(t: str) -> str:
-    URL_RE  = re.compile(r"https?://\S+|www\.\S+")
-    USER_RE = re.compile(r"@\w+")
-    t = URL_RE.sub(" <url> ", str(t))
+    t = URL_RE.sub(" <url> ", t if isinstance(t, str) else str(t))
     t = USER_RE.sub(" <user> ", t)
-    t = re.sub(r"\s+", " ", t).strip()
+    t = WS_RE.sub(" ", t).strip()
     return t
 
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax over the last axis, in NumPy (ONNX Runtime already returns ndarrays)."""
+    e = np.exp(logits - logits.max(-1, keepdims=True))
+    return e / e.sum(-1, keepdims=True)
+
 class ORTModel(TextModel):
     def __init__(self, ort_session: ort.InferenceSession, tokenizer, IDX2LABEL: dict):
-        super().__init__()
+        super().__init__(IDX2LABEL)
         self.ort_sesion = ort_session
         self.tokenizer = tokenizer
-        self.IDX2LABEL = IDX2LABEL
+        self.input_names = [i.name for i in ort_session.get_inputs()]
+        # If the graph expects a name the tokenizer can't create, fail loudly at load, not per request
+        unknown = set(self.input_names) - {"input_ids", "attention_mask", "token_type_ids"}
+        if unknown:
+            raise KeyError(f"Missing required ONNX input(s): {sorted(unknown)}")
+        # ask the tokenizer for token_type_ids only if the graph takes them (it fills them in Rust)
+        self._needs_tti = "token_type_ids" in self.input_names
+        logits_dim = next((o.shape[-1] for o in ort_session.get_outputs() if o.name == "logits"), None)
+        self.num_labels = logits_dim if isinstance(logits_dim, int) else len(IDX2LABEL)
+        # io binding + output buffer are reused across calls, one set per thread (/predict_batch
+        # and the /predict batcher run on different threadpool workers)
+        self._local = threading.local()
+
+    def _encode(self, text: str, max_len: int) -> dict:
+        # a single text never needs padding; the graph takes dynamic sequence lengths
+        enc = self.tokenizer([text], max_length=max_len, truncation=True, return_token_type_ids=self._needs_tti, return_tensors="np")
+        return self._feed(enc)
+
+    def _feed(self, enc) -> dict:
+        # --- feed ONLY what the graph declares; token_type_ids are only synthesized for
+        # tokenizers that can't return them ---
+        # fast tokenizers already return int64, so this is normally a no-copy pass-through
+        feed = {name: np.asarray(enc[name], dtype=np.int64) for name in self.input_names if name in enc}
+        if self._needs_tti and "token_type_ids" not in feed:
+            feed["token_type_ids"] = np.zeros_like(enc["input_ids"], dtype=np.int64)
+        return feed
+
+    def _run(self, feed: dict) -> np.ndarray:
+        """session.run for "logits", written into a reused per-thread buffer; valid until this thread's next call."""
+        local = self._local
+        if not hasattr(local, "io"):
+            local.io = self.ort_sesion.io_binding()
+            local.out = np.empty((0, self.num_labels), dtype=np.float32)
+        io = local.io
+        batch = next(iter(feed.values())).shape[0]
+        if local.out.shape[0] < batch:
+            local.out = np.empty((batch, self.num_labels), dtype=np.float32)
+        for name, arr in feed.items():
+            io.bind_cpu_input(name, arr)
+        io.bind_output("logits", device_type="cpu", element_type=np.float32,
+                       shape=(batch, self.num_labels), buffer_ptr=local.out.ctypes.data)
+        self.ort_sesion.run_with_iobinding(io)
+        return local.out[:batch]
 
-    @torch.inference_mode()
     def predict_one(self, text: str, max_len: int = 256):
-        text = normalize_tweet(text)
-        enc = self.tokenizer([text], max_length=max_len, truncation=True, padding=True, return_tensors="np")
-        sess_input_names = [i.name for i in self.ort_sesion.get_inputs()]
-
-        # --- feed ONLY what the graph declares; synthesize token_type_ids if required ---
-        feed = {}
-        for name in sess_input_names:
-            if name in enc:
-                feed[name] = enc[name].astype(np.int64)
-            elif name == "token_type_ids":
-                feed[name] = np.zeros_like(enc["input_ids"], dtype=np.int64)
-            else:
-                # If the graph expects a name we didn't create, fail loudly
-                raise KeyError(f"Missing required ONNX input: {name}")
-
-        logits = self.ort_sesion.run(["logits"], feed)[0]
-        probs = torch.softmax(torch.tensor(logits), dim=-1).numpy()[0]
+        logits = self._run(self._encode(normalize_tweet(text), max_len))
+        probs = softmax(logits)[0]
         pred = int(np.argmax(probs))
-        return self.IDX2LABEL.get(pred, pred), f"P({self.IDX2LABEL.get(0,'0')})={probs[0]:.3f}, P({self.IDX2LABEL.get(1,'1')})={probs[1]:.3f}"
+        return self._result(pred, probs)
+
+    def predict_batch(self, texts: list[str], max_len: int = 256):
+        """Like predict_one for each text, but one tokenizer call and one session.run for the whole batch."""
+        return self._finish_batch(self._prepare_batch(texts, max_len))
+
+    def predict_stream(self, batches: Iterable[list[str]], max_len: int = 256) -> Iterator[list]:
+        """Like TextModel.predict_stream, but the next batch is normalized and tokenized on a
+        worker thread while ONNX Runtime runs the current one (both release the GIL)."""
+        batches = iter(batches)
+        first = next(batches, None)
+        if first is None:
+            return
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(self._prepare_batch, first, max_len)
+            for batch in batches:
+                feed = pending.result()
+                pending = pool.submit(self._prepare_batch, batch, max_len)
+                yield self._finish_batch(feed)
+            yield self._finish_batch(pending.result())
+
+    def _prepare_batch(self, texts: list[str], max_len: int) -> dict:
+        # pad only to the longest text in this batch, never to max_len.
+        # No per-text tokenizer cache here: repeated texts are answered by predict_many's
+        # prediction LRU before they reach the tokenizer, so only unseen texts arrive.
+        enc = self.tokenizer([normalize_tweet(t) for t in texts], max_length=max_len, truncation=True, padding="longest", return_token_type_ids=self._needs_tti, return_tensors="np")
+        return self._feed(enc)
+
+    def _finish_batch(self, feed: dict):
+        logits = self._run(feed)
+        probs = softmax(logits)
+        preds = np.argmax(probs, axis=-1)
+        return [self._result(int(pred), p) for pred, p in zip(preds, probs)]
     
 class HFModel(TextModel):
-    def __init__(self, model: AutoModelForSequenceClassification, tokenizer: AutoTokenizer, IDX2LABEL: dict):
-        super().__init__()
+    def __init__(self, model, tokenizer, IDX2LABEL: dict, device):
+        super().__init__(IDX2LABEL)
         self.model = model
         self.tokenizer = tokenizer
-        self.IDX2LABEL = IDX2LABEL
+        self.device = device
+        # bound once here so the module never imports torch itself (ONNX deployments don't have it)
+        import torch
+        self._torch = torch
 
-    @torch.inference_mode()
     def predict_one(self, text: str, max_len: int = 256):
+        torch = self._torch
         text = normalize_tweet(text)
-        enc = self.tokenizer(text, truncation=True, max_length=max_len, padding=True, return_tensors="pt")
-        enc = {k: v.to(device) for k, v in enc.items()}
-        logits = self.model(**enc).logits
-        probs = torch.softmax(logits, dim=-1).squeeze(0).cpu().numpy()
+        enc = self.tokenizer(text, truncation=True, max_length=max_len, return_tensors="pt")
+        enc = {k: v.to(self.device) for k, v in enc.items()}
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type, dtype=torch.float16, enabled=self.device.type == "cuda"):
+            logits = self.model(**enc).logits
+            probs = torch.softmax(logits.float(), dim=-1).squeeze(0).cpu().numpy()
         pred = int(np.argmax(probs))
-        return self.IDX2LABEL.get(pred, pred), f"P({self.IDX2LABEL.get(0,'0')})={probs[0]:.3f}, P({self.IDX2LABEL.get(1,'1')})={probs[1]:.3f}"
+        return self._result(pred, probs)
+
+    def predict_batch(self, texts: list[str], max_len: int = 256):
+        """Like predict_one for each text, but one tokenizer call and one forward pass for the whole batch."""
+        torch = self._torch
+        enc = self.tokenizer([normalize_tweet(t) for t in texts], truncation=True, max_length=max_len, padding="longest", return_tensors="pt")
+        enc = {k: v.to(self.device) for k, v in enc.items()}
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type, dtype=torch.float16, enabled=self.device.type == "cuda"):
+            logits = self.model(**enc).logits
+            probs = torch.softmax(logits.float(), dim=-1).cpu().numpy()
+        preds = np.argmax(probs, axis=-1)
+        return [self._result(int(pred), p) for pred, p in zip(preds, probs)]
+
+def warmup(model: TextModel) -> TextModel:
+    """Run a few throwaway predictions so arena allocation, kernel selection and tokenizer
+    setup happen at startup instead of on the first requests."""
+    try:
+        # twice, so ORT's memory pattern has a recorded shape to reuse; plus one padded batch
+        model.predict_one("warmup", max_len=64)
+        model.predict_one("warmup", max_len=64)
+        model.predict_many(["warmup", "warm up the batch path"], max_len=64)
+        if isinstance(model, HFModel) and model.device.type == "cuda":
+            model._torch.cuda.synchronize()
+    except Exception as ex:
+        print("Warmup failed:", ex)
+    return model
 
 def start() -> TextModel:
     ENTITY = "alice-chua-university-of-toronto-org"  # org/user that owns the registry
     TARGET = "wandb-registry-model/disaster-tweet-model-registry"  # collection (no entity here)
     ALIAS  = "production"
 
+    import wandb
+    from transformers import AutoTokenizer
+
     api = wandb.Api()
     art = api.artifact(f"{ENTITY}/{TARGET}:{ALIAS}")
     local_dir = art.download()
@@ -81,9 +256,23 @@ def start() -> TextModel:
 
 
     # ----- helpers -----
-    def _find_one(root: str, pattern: str) -> str:
-        p = list(pathlib.Path(root).rglob(pattern))
-        return str(p[0]) if p else ""
+    def _index_artifact(root: str) -> dict:
+        """One walk over the artifact: first path for every file/dir name, plus "*.onnx" for the model."""
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in dirnames + sorted(filenames):
+                path = os.path.join(dirpath, name)
+                found.setdefault(name, path)
+                # skip the INT8/FP16 copies start() writes next to the original
+                if name.endswith(".onnx") and not name.endswith((".int8.onnx", ".fp16.onnx")):
+                    found.setdefault("*.onnx", path)
+        return found
+
+    artifact_files = _index_artifact(local_dir)
+
+    def _find_one(pattern: str) -> str:
+        return artifact_files.get(pattern, "")
 
     def resolve_model_name(local_dir: str, meta: dict) -> str:
         # 1) prefer explicit metadata from training/logging
@@ -124,33 +313,118 @@ def start() -> TextModel:
     IDX2LABEL = DEFAULT_ID2LABEL
     
     # ===== Branch A: ONNX artifact =====
-    onnx_path = _find_one(local_dir, "*.onnx")
+    onnx_path = _find_one("*.onnx")
     if fmt == "onnx" or onnx_path:
 
     
-        tok_dir = _find_one(local_dir, "tokenizer") or local_dir
+        tok_dir = _find_one("tokenizer") or local_dir
         tokenizer = AutoTokenizer.from_pretrained(tok_dir, use_fast=True)
     
         # try to load id2label if present
-        id2label_path = _find_one(local_dir, "id2label.json")
+        id2label_path = _find_one("id2label.json")
         if id2label_path:
             with open(id2label_path, "r") as f:
                 raw = json.load(f)
             IDX2LABEL = {int(k): v for k, v in raw.items()}
     
-        sess = ort.InferenceSession(onnx_path or _find_one(local_dir, "*.onnx"), providers=["CPUExecutionProvider"])
-        print("Loaded ONNX @production ✅ | model:", MODEL_NAME)
-        return ORTModel(sess, tokenizer, IDX2LABEL)
+        model_path = onnx_path or _find_one("*.onnx")
+
+        # best available execution provider, CPU always last as the fallback
+        available = ort.get_available_providers()
+        providers = []
+        on_cuda = "CUDAExecutionProvider" in available
+        if on_cuda:
+            providers.append(("CUDAExecutionProvider", {
+                "device_id": 0,
+                "cudnn_conv_algo_search": "EXHAUSTIVE",
+                "arena_extend_strategy": "kNextPowerOfTwo",
+            }))
+        if "OpenVINOExecutionProvider" in available:
+            providers.append("OpenVINOExecutionProvider")
+        providers.append("CPUExecutionProvider")
+        on_cpu = len(providers) == 1
+
+        # INT8 dynamic quantization (set ORT_QUANTIZE=0 to serve the FP32 graph as-is).
+        # The quantized copy is written next to the download, so it is only built once per artifact.
+        # Only for CPU: the dynamic-quant integer ops have no GPU kernels and would bounce to the CPU.
+        if on_cpu and os.getenv("ORT_QUANTIZE", "1") != "0":
+            int8_path = model_path[:-len(".onnx")] + ".int8.onnx"
+            if not os.path.exists(int8_path):
+                try:
+                    from onnxruntime.quantization import quantize_dynamic, QuantType
+                    quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8,
+                                     op_types_to_quantize=["MatMul", "Attention", "Gather"])
+                    print("Quantized ONNX model to INT8:", int8_path)
+                except Exception as ex:
+                    print("INT8 quantization failed, using FP32 model:", ex)
+            if os.path.exists(int8_path):
+                model_path = int8_path
+        # FP16 for tensor cores on GPU (set ORT_FP16=0 to keep FP32); inputs/outputs stay int64/float32
+        elif on_cuda and os.getenv("ORT_FP16", "1") != "0":
+            fp16_path = model_path[:-len(".onnx")] + ".fp16.onnx"
+            if not os.path.exists(fp16_path):
+                try:
+                    from onnxruntime.transformers import optimizer
+                    # 0 lets the optimizer detect heads/hidden size from the graph when there is no config
+                    cfg_path = _find_one("config.json")
+                    cfg = {}
+                    if cfg_path:
+                        with open(cfg_path, "r", encoding="utf-8") as f:
+                            cfg = json.load(f)
+                    opt = optimizer.optimize_model(model_path, model_type="bert",
+                                                   num_heads=cfg.get("num_attention_heads", 0),
+                                                   hidden_size=cfg.get("hidden_size", 0))
+                    opt.convert_float_to_float16(keep_io_types=True)
+                    opt.save_model_to_file(fp16_path)
+                    print("Converted ONNX model to FP16:", fp16_path)
+                except Exception as ex:
+                    print("FP16 conversion failed, using FP32 model:", ex)
+            if os.path.exists(fp16_path):
+                model_path = fp16_path
+
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # one request graph at a time: all threads go to intra-op parallelism (ORT_INTRA overrides the count)
+        so.intra_op_num_threads = int(os.getenv("ORT_INTRA", os.cpu_count() or 1))
+        so.inter_op_num_threads = 1
+        so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        so.enable_cpu_mem_arena = True
+        so.enable_mem_pattern = True
+        sess = ort.InferenceSession(model_path, sess_options=so, providers=providers)
+        print("Loaded ONNX @production ✅ | model:", MODEL_NAME, "| providers:", sess.get_providers())
+        return warmup(ORTModel(sess, tokenizer, IDX2LABEL))
 
     # ===== Branch B: PyTorch HF directory =====
     else:
+        import torch
+        from transformers import AutoModelForSequenceClassification
 
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         tokenizer = AutoTokenizer.from_pretrained(local_dir, use_fast=True)
         model = AutoModelForSequenceClassification.from_pretrained(local_dir)
         if getattr(model.config, "id2label", None):
             IDX2LABEL = {int(k): v for k, v in model.config.id2label.items()}
         
         model.to(device).eval()
+        if device.type == "cuda":
+            # FP16 weights on GPU: half the memory traffic and tensor-core matmuls; CPU stays FP32
+            model.half()
+            torch.backends.cuda.enable_flash_sdp(True)
+
+        # torch.compile fuses kernels and cuts per-layer Python overhead (set TORCH_COMPILE=0 to stay eager).
+        # Default mode, not "reduce-overhead": its CUDA graphs are not safe across the executor threads
+        # and would be re-recorded for every new batch shape.
+        # Compilation is lazy, so run one forward here: it moves the compile out of the first request
+        # and surfaces failures (e.g. no C++ compiler in the image) while eager is still an option.
+        if os.getenv("TORCH_COMPILE", "1") != "0":
+            try:
+                compiled = torch.compile(model, dynamic=True)
+                with torch.inference_mode():
+                    enc = tokenizer(["warmup"], return_tensors="pt")
+                    compiled(**{k: v.to(device) for k, v in enc.items()})
+                model = compiled
+            except Exception as ex:
+                print("torch.compile failed, running eager:", ex)
 
         print("Loaded PyTorch HF @production ✅ | model:", MODEL_NAME)
-        return HFModel(model, tokenizer, IDX2LABEL)
\ No newline at end of file
+        return warmup(HFModel(model, tokenizer, IDX2LABEL, device))
\ No newline at end of file